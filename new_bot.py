@@ -1,3 +1,6 @@
+import time
+STARTED_AT = time.perf_counter()  # отсчёт времени старта — до тяжёлых импортов
+
 import traceback  # для показа полного стектрейса ошибок
 import logging
 import datetime
@@ -21,25 +24,69 @@ from telegram.ext import (
     ApplicationBuilder, CommandHandler, ContextTypes, ChatMemberHandler
 )
 from telegram.error import TelegramError
+from telegram.request import HTTPXRequest
 
-from db import Database  # Импортируем класс базы
+from db import Database, DATABASE_URL  # Импортируем класс базы
 
 load_dotenv()
 
-# Загружаем переменные окружения
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-CHANNEL_ID = int(os.getenv("CHANNEL_ID"))
-ADMIN_IDS = list(map(int, os.getenv("ADMIN_IDS", "").split(','))) if os.getenv("ADMIN_IDS") else []
-CURATOR_ID = int(os.getenv("CURATOR_ID", "0"))
-SUBSCRIPTION_MINUTES = int(os.getenv("SUBSCRIPTION_MINUTES", "525600"))
-
 # Настройка логгера
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Ошибки конфигурации копим здесь и проверяем в validate_config() до любых сетевых вызовов
+CONFIG_ERRORS = []
+
+# Пустое значение считаем незаданным и берём дефолт
+def env_int(name: str, default: str | None = None) -> int:
+    raw = os.getenv(name, "").strip() or default
+    if raw is None:
+        CONFIG_ERRORS.append(f"{name} не задана")
+        return 0
+    try:
+        return int(raw)
+    except ValueError:
+        CONFIG_ERRORS.append(f"{name} должна быть целым числом, получено: {raw!r}")
+        return 0
+
+def env_int_list(name: str) -> list[int]:
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return []
+    try:
+        return [int(x) for x in raw.split(',')]
+    except ValueError:
+        CONFIG_ERRORS.append(f"{name} должна быть списком чисел через запятую, получено: {raw!r}")
+        return []
+
+# Загружаем переменные окружения
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+CHANNEL_ID = env_int("CHANNEL_ID")
+ADMIN_IDS = env_int_list("ADMIN_IDS")
+CURATOR_ID = env_int("CURATOR_ID", "0")
+SUBSCRIPTION_MINUTES = env_int("SUBSCRIPTION_MINUTES", "525600")
+HEALTH_PORT = env_int("PORT", "0")  # 0 — healthcheck выключен
+
+# Проверка конфигурации — падаем сразу и со всеми ошибками, а не при первом апдейте
+def validate_config():
+    errors = list(CONFIG_ERRORS)
+    if not BOT_TOKEN:
+        errors.append("BOT_TOKEN не задана")
+    if not DATABASE_URL:
+        errors.append("DATABASE_URL не задана")
+
+    if errors:
+        for error in errors:
+            logger.error(f"❌ Конфигурация: {error}")
+        raise SystemExit(1)
+
 # Создаём экземпляр базы данных
 db = Database()
 
+# Готовность бота: выставляется, когда пул БД поднят и polling запущен; сбрасывается при остановке.
+# Наружу отдаётся через /health (см. start_health_server)
+ready = asyncio.Event()
+
 # Проверка, является ли пользователь админом
 def is_admin(user_id: int) -> bool:
     return user_id in ADMIN_IDS
@@ -282,7 +329,8 @@ async def check_new_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
     )
 
     try:
-        log_subscription(username, student["full_name"], now, valid_until)
+        # gspread синхронный (и импортируется лениво) — уводим с event loop
+        await asyncio.to_thread(log_subscription, username, student["full_name"], now, valid_until)
     except Exception as e:
         logger.error(f"Не удалось залогировать подписку @{username} в Google Sheets: {e}")
 
@@ -404,10 +452,89 @@ async def silent_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     pass
 
 # --- Запуск бота ---
-async def main():
-    await db.connect()
+async def timed(phase: str, timings: dict, coro):
+    started = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        timings[phase] = time.perf_counter() - started
+
+# db и bot идут параллельно внутри init — выводим их вложенно, чтобы фазы складывались в total
+INIT_SUBPHASES = ("db", "bot")
 
-    app = ApplicationBuilder().token(BOT_TOKEN).build()
+def log_startup_timings(timings: dict):
+    parts = []
+    for phase, seconds in timings.items():
+        if phase in INIT_SUBPHASES:
+            continue
+        part = f"{phase}={seconds:.2f}s"
+        if phase == "init":
+            nested = ", ".join(f"{sub}={timings[sub]:.2f}s" for sub in INIT_SUBPHASES if sub in timings)
+            part += f" (параллельно: {nested})"
+        parts.append(part)
+    logger.info(f"⏱ Время старта: {', '.join(parts)}")
+
+# --- Healthcheck для Railway: 200 только когда бот готов ---
+async def start_health_server(port: int):
+    from aiohttp import web  # грузим только если задан PORT
+
+    async def health(request):
+        if ready.is_set():
+            return web.Response(text="ok")
+        return web.Response(status=503, text="starting")
+
+    health_app = web.Application()
+    health_app.router.add_get("/health", health)
+    runner = web.AppRunner(health_app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    logger.info(f"🩺 Healthcheck слушает :{port}/health")
+    return runner
+
+# Джоба с first=0 срабатывает только после app.start(), т.е. когда polling уже идёт.
+# Планируется прямо перед run_polling() и без misfire_grace_time — иначе APScheduler
+# молча пропустит её, если старт затянется больше чем на секунду
+async def mark_ready(context: ContextTypes.DEFAULT_TYPE):
+    timings = context.job.data
+    timings["polling"] = time.perf_counter() - context.bot_data["polling_started_at"]
+    timings["total"] = time.perf_counter() - STARTED_AT
+    log_startup_timings(timings)
+
+    ready.set()
+    logger.info("✅ Бот запущен и принимает апдейты")
+
+async def on_stop(app):
+    ready.clear()
+    logger.info("🛑 Бот остановлен")
+
+async def on_shutdown(app):
+    if db.pool:
+        await db.pool.close()
+    runner = app.bot_data.get("health_runner")
+    if runner:
+        await runner.cleanup()
+
+async def main():
+    timings = {"imports": time.perf_counter() - STARTED_AT}
+    started = time.perf_counter()
+
+    validate_config()
+    timings["config"] = time.perf_counter() - started
+    started = time.perf_counter()
+
+    # HTTP-клиенты бота создаём сами, чтобы закрыть их при сбое старта (размеры пулов — как у PTB по умолчанию)
+    bot_request = HTTPXRequest(connection_pool_size=256)
+    get_updates_request = HTTPXRequest(connection_pool_size=1)
+
+    app = (
+        ApplicationBuilder()
+        .token(BOT_TOKEN)
+        .request(bot_request)
+        .get_updates_request(get_updates_request)
+        .post_stop(on_stop)
+        .post_shutdown(on_shutdown)
+        .build()
+    )
 
     # --- Основные команды ---
     app.add_handler(CommandHandler("start", start))
@@ -437,7 +564,36 @@ async def main():
     # --- Оповещение за 3 дня до истечения подписки ---
     app.job_queue.run_repeating(remind_expiring_subscriptions, interval=86400, first=20) 
 
-    logger.info("✅ Бот запущен")
+    timings["build"] = time.perf_counter() - started
+
+    # --- Healthcheck поднимаем до инициализации, чтобы Railway видел 503, а не отказ соединения ---
+    if HEALTH_PORT:
+        app.bot_data["health_runner"] = await timed("health", timings, start_health_server(HEALTH_PORT))
+
+    # --- Пул БД и инициализация бота (getMe) идут параллельно; db и bot входят в init ---
+    # run_polling() повторно initialize() не делает — приложение уже инициализировано
+    results = await timed("init", timings, asyncio.gather(
+        timed("db", timings, db.connect()),
+        timed("bot", timings, app.initialize()),
+        return_exceptions=True,
+    ))
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        for error in errors:
+            logger.error(f"💥 Ошибка при старте: {error!r}")
+        # Закрываем то, что успело подняться. Если упал getMe, app.shutdown() ничего не сделает
+        # (бот не помечен инициализированным), поэтому свои HTTP-клиенты закрываем явно
+        await app.shutdown()
+        await asyncio.gather(bot_request.shutdown(), get_updates_request.shutdown())
+        await on_shutdown(app)
+        timings["total"] = time.perf_counter() - STARTED_AT
+        log_startup_timings(timings)
+        raise SystemExit(1)
+
+    # --- Готовность выставится, когда polling реально запустится ---
+    app.job_queue.run_once(mark_ready, 0, data=timings, job_kwargs={"misfire_grace_time": None})
+
+    app.bot_data["polling_started_at"] = time.perf_counter()
     await app.run_polling()
 
 if __name__ == "__main__":
@@ -1,8 +1,6 @@
 import os
 import json
 from datetime import datetime
-import gspread
-from google.oauth2.service_account import Credentials
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
@@ -10,7 +8,11 @@ SCOPES = [
 ]
 
 # Авторизация и подключение к Google Sheets
+# gspread и google-auth тяжёлые — грузим их только при первой записи, а не на старте бота
 def get_worksheet():
+    import gspread
+    from google.oauth2.service_account import Credentials
+
     creds_json_str = os.getenv("GOOGLE_CREDENTIALS")
     if not creds_json_str:
         raise Exception("❌ Переменная GOOGLE_CREDENTIALS не найдена.")